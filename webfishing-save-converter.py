@@ -1,9 +1,18 @@
 import struct
 import json
+import mmap
+import os
+import shutil
+import tempfile
 import argparse
 import sys
 from enum import IntEnum
-from typing import Any, Dict, List, Union, BinaryIO
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union, BinaryIO
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 class GodotVariantType(IntEnum):
     NIL = 0
@@ -34,69 +43,126 @@ class GodotVariantType(IntEnum):
     POOL_VECTOR3_ARRAY = 25
     POOL_COLOR_ARRAY = 26
 
+_U32 = struct.Struct('<I')
+_I32 = struct.Struct('<i')
+_I64 = struct.Struct('<q')
+_F32 = struct.Struct('<f')
+_F64 = struct.Struct('<d')
+_F32X2 = struct.Struct('<ff')
+_F32X3 = struct.Struct('<fff')
+_F32X4 = struct.Struct('<ffff')
+
+# Type tag and payload packed together for the common scalar variants
+_TAG_I32 = struct.Struct('<Ii')
+_TAG_I64 = struct.Struct('<Iq')
+_TAG_F64 = struct.Struct('<Id')
+_TAG_V2 = struct.Struct('<Iff')
+_TAG_V3 = struct.Struct('<Ifff')
+_TAG_COLOR = struct.Struct('<Iffff')
+
+_INT64_TAG = GodotVariantType.INT | (1 << 16)
+_DOUBLE_TAG = GodotVariantType.REAL | (1 << 16)
+
+_NIL_BYTES = _U32.pack(GodotVariantType.NIL)
+_TRUE_BYTES = struct.pack('<II', GodotVariantType.BOOL, 1)
+_FALSE_BYTES = struct.pack('<II', GodotVariantType.BOOL, 0)
+
+_PAD3 = b'\x00\x00\x00'
+
+_I32_MIN = -0x80000000
+_I32_MAX = 0x7FFFFFFF
+
+# Marks an exhausted container while serializing
+_END = object()
+
+# Buffered output is handed to the file once it grows past this size
+_FLUSH_SIZE = 1 << 20
+
 class SaveFileReader:
-    def __init__(self, data: bytes):
-        self.data = data
+    def __init__(self, data: Union[bytes, memoryview]):
+        # An existing memoryview is used as-is so its owner can release it
+        self.data = data if isinstance(data, memoryview) else memoryview(data)
         self.position = 0
         
     def read_uint32(self) -> int:
-        value = struct.unpack('<I', self.data[self.position:self.position + 4])[0]
+        value = _U32.unpack_from(self.data, self.position)[0]
         self.position += 4
         return value
     
     def read_int32(self) -> int:
-        value = struct.unpack('<i', self.data[self.position:self.position + 4])[0]
+        value = _I32.unpack_from(self.data, self.position)[0]
         self.position += 4
         return value
     
     def read_int64(self) -> int:
-        value = struct.unpack('<q', self.data[self.position:self.position + 8])[0]
+        value = _I64.unpack_from(self.data, self.position)[0]
         self.position += 8
         return value
     
     def read_float(self) -> float:
-        value = struct.unpack('<f', self.data[self.position:self.position + 4])[0]
+        value = _F32.unpack_from(self.data, self.position)[0]
         self.position += 4
         return value
     
     def read_double(self) -> float:
-        value = struct.unpack('<d', self.data[self.position:self.position + 8])[0]
+        value = _F64.unpack_from(self.data, self.position)[0]
         self.position += 8
         return value
     
     def read_string(self, length: int) -> str:
-        value = self.data[self.position:self.position + length].decode('utf-8', errors='ignore')
+        value = bytes(self.data[self.position:self.position + length]).decode('utf-8', errors='ignore')
         self.position += length
         return value
     
+    def read_values(self, code: str, count: int, item_size: int) -> tuple:
+        """Read `count` packed values of struct type `code` in a single unpack."""
+        values = struct.unpack_from(f'<{count}{code}', self.data, self.position)
+        self.position += count * item_size
+        return values
+
+    def read_count(self, item_size: int) -> int:
+        """Read an element count, rejecting counts the remaining data cannot hold."""
+        count = self.read_uint32()
+        if count > (len(self.data) - self.position) // item_size:
+            raise RuntimeError(f"Invalid element count {count} at offset {self.position - 4}")
+        return count
+
     def advance(self, count: int):
         self.position += count
 
 class SaveFileWriter:
-    def __init__(self):
+    def __init__(self, fp: Optional[BinaryIO] = None):
         self.data = bytearray()
+        self.fp = fp
+        self.flush_at = _FLUSH_SIZE if fp is not None else sys.maxsize
 
     def write_uint32(self, value: int):
-        self.data.extend(struct.pack('<I', value))
+        self.data += _U32.pack(value)
 
     def write_int32(self, value: int):
-        self.data.extend(struct.pack('<i', value))
+        self.data += _I32.pack(value)
 
     def write_int64(self, value: int):
-        self.data.extend(struct.pack('<q', value))
+        self.data += _I64.pack(value)
 
     def write_float(self, value: float):
-        self.data.extend(struct.pack('<f', value))
+        self.data += _F32.pack(value)
 
     def write_double(self, value: float):
-        self.data.extend(struct.pack('<d', value))
+        self.data += _F64.pack(value)
 
     def write_string(self, value: str):
         encoded = value.encode('utf-8')
-        self.write_uint32(len(encoded))
-        self.data.extend(encoded)
-        padding = b'\x00' * ((4 - len(encoded) % 4) % 4)
-        self.data.extend(padding)
+        length = len(encoded)
+        self.data += _U32.pack(length)
+        self.data += encoded
+        self.data += _PAD3[:(-length) & 3]
+
+    def flush(self):
+        """Write buffered data to the output file and empty the buffer."""
+        if self.fp is not None and self.data:
+            self.fp.write(self.data)
+            del self.data[:]
 
     def get_data(self) -> bytes:
         return bytes(self.data)
@@ -107,142 +173,360 @@ class WebFishingDeserializer:
         size = self.reader.read_uint32()
         if size < 4:
             raise RuntimeError("Invalid save file")
-            
-    def align_value(self, value: int, alignment: int) -> int:
-        return ((value + alignment - 1) // alignment) * alignment
-    
+        self._dispatch = {
+            GodotVariantType.NIL: self._read_nil,
+            GodotVariantType.BOOL: self._read_bool,
+            GodotVariantType.INT: self._read_int,
+            GodotVariantType.REAL: self._read_real,
+            GodotVariantType.STRING: self._read_string,
+            GodotVariantType.VECTOR2: self._read_vector2,
+            GodotVariantType.VECTOR3: self._read_vector3,
+            GodotVariantType.COLOR: self._read_color,
+            GodotVariantType.DICTIONARY: self._read_dictionary,
+            GodotVariantType.ARRAY: self._read_array,
+            GodotVariantType.POOL_BYTE_ARRAY: self._read_pool_byte_array,
+            GodotVariantType.POOL_INT_ARRAY: self._read_pool_int_array,
+            GodotVariantType.POOL_REAL_ARRAY: self._read_pool_real_array,
+            GodotVariantType.POOL_STRING_ARRAY: self._read_pool_string_array,
+            GodotVariantType.POOL_VECTOR2_ARRAY: self._read_pool_vector2_array,
+            GodotVariantType.POOL_VECTOR3_ARRAY: self._read_pool_vector3_array,
+            GodotVariantType.POOL_COLOR_ARRAY: self._read_pool_color_array,
+        }
+
     def read_value(self) -> Any:
         type_val = self.reader.read_uint32()
         base_type = type_val & 0xFFFF
-        flag = type_val >> 16
-        
-        if base_type == GodotVariantType.NIL:
-            return None
-            
-        elif base_type == GodotVariantType.BOOL:
-            return self.reader.read_uint32() == 1
-            
-        elif base_type == GodotVariantType.INT:
-            if flag == 0:
-                return self.reader.read_int32()
-            return self.reader.read_int64()
-            
-        elif base_type == GodotVariantType.REAL:
-            if flag == 0:
-                return self.reader.read_float()
-            return self.reader.read_double()
-            
-        elif base_type == GodotVariantType.STRING:
-            length = self.reader.read_uint32()
-            padded_length = self.align_value(length, 4)
-            string = self.reader.read_string(length)
-            self.reader.advance(padded_length - length)
-            return string
-            
-        elif base_type == GodotVariantType.VECTOR2:
-            return {
-                "x": self.reader.read_float(),
-                "y": self.reader.read_float()
-            }
-            
-        elif base_type == GodotVariantType.DICTIONARY:
-            result = {}
-            size = self.reader.read_uint32()
-            for _ in range(size):
-                key_val = self.read_value()
-                if isinstance(key_val, str):
-                    key = key_val
-                elif isinstance(key_val, int):
-                    key = f"0x{key_val:08X}"
-                else:
-                    raise RuntimeError(f"Invalid dictionary key type: {type(key_val)}")
-                result[key] = self.read_value()
-            return result
-            
-        elif base_type == GodotVariantType.ARRAY:
-            result = []
-            size = self.reader.read_uint32()
-            for _ in range(size):
-                result.append(self.read_value())
-            return result
-        
-        else:
+        handler = self._dispatch.get(base_type)
+        if handler is None:
             print(f"Skipping unsupported type: {base_type}")
             return f"Unsupported type {base_type}"
+        return handler(type_val >> 16)
 
-class WebFishingSerializer:
-    def __init__(self):
-        self.writer = SaveFileWriter()
+    def _read_nil(self, flag: int) -> None:
+        return None
 
-    def align_value(self, value: int, alignment: int) -> int:
-        return ((value + alignment - 1) // alignment) * alignment
+    def _read_bool(self, flag: int) -> bool:
+        return self.reader.read_uint32() == 1
 
-    def write_value(self, value: Any):
-        if value is None:
-            self.writer.write_uint32(GodotVariantType.NIL)
-        elif isinstance(value, bool):
-            self.writer.write_uint32(GodotVariantType.BOOL)
-            self.writer.write_uint32(1 if value else 0)
-        elif isinstance(value, int):
-            if -2**31 <= value <= 2**31-1:
-                self.writer.write_uint32(GodotVariantType.INT)
-                self.writer.write_int32(value)
-            else:
-                self.writer.write_uint32(GodotVariantType.INT | (1 << 16))
-                self.writer.write_int64(value)
-        elif isinstance(value, float):
-            self.writer.write_uint32(GodotVariantType.REAL | (1 << 16))
-            self.writer.write_double(value)
-        elif isinstance(value, str):
-            self.writer.write_uint32(GodotVariantType.STRING)
-            self.writer.write_string(value)
-        elif isinstance(value, dict):
-            if len(value) == 2 and "x" in value and "y" in value:
-                self.writer.write_uint32(GodotVariantType.VECTOR2)
-                self.writer.write_float(value["x"])
-                self.writer.write_float(value["y"])
+    # INT and REAL unpack straight from the reader's buffer, skipping a
+    # second Python frame per value
+    def _read_int(self, flag: int) -> int:
+        reader = self.reader
+        if flag == 0:
+            value = _I32.unpack_from(reader.data, reader.position)[0]
+            reader.position += 4
+        else:
+            value = _I64.unpack_from(reader.data, reader.position)[0]
+            reader.position += 8
+        return value
+
+    def _read_real(self, flag: int) -> float:
+        reader = self.reader
+        if flag == 0:
+            value = _F32.unpack_from(reader.data, reader.position)[0]
+            reader.position += 4
+        else:
+            value = _F64.unpack_from(reader.data, reader.position)[0]
+            reader.position += 8
+        return value
+
+    def _read_string(self, flag: int) -> str:
+        length = self.reader.read_uint32()
+        string = self.reader.read_string(length)
+        self.reader.advance((-length) & 3)
+        return string
+
+    def _read_vector2(self, flag: int) -> Dict[str, float]:
+        reader = self.reader
+        x, y = _F32X2.unpack_from(reader.data, reader.position)
+        reader.position += 8
+        return {"x": x, "y": y}
+
+    def _read_vector3(self, flag: int) -> Dict[str, float]:
+        reader = self.reader
+        x, y, z = _F32X3.unpack_from(reader.data, reader.position)
+        reader.position += 12
+        return {"x": x, "y": y, "z": z}
+
+    def _read_color(self, flag: int) -> Dict[str, float]:
+        reader = self.reader
+        r, g, b, a = _F32X4.unpack_from(reader.data, reader.position)
+        reader.position += 16
+        return {"r": r, "g": g, "b": b, "a": a}
+
+    def _read_dictionary(self, flag: int) -> Dict:
+        result = {}
+        reader = self.reader
+        data = reader.data
+        unpack_u32 = _U32.unpack_from
+        string_type = int(GodotVariantType.STRING)
+        read = self.read_value
+        read_string = self._read_string
+        size = reader.read_uint32()
+        for _ in range(size):
+            # String keys are by far the most common, so decode them inline
+            # rather than going back through the dispatcher
+            if unpack_u32(data, reader.position)[0] == string_type:
+                reader.position += 4
+                key = read_string(0)
+                result[key] = read()
+                continue
+            key_val = read()
+            if isinstance(key_val, str):
+                key = key_val
+            elif isinstance(key_val, int):
+                key = f"0x{key_val:08X}"
             else:
-                self.writer.write_uint32(GodotVariantType.DICTIONARY)
-                self.writer.write_uint32(len(value))
-                for k, v in value.items():
-                    if k.startswith("0x"):
-                        self.write_value(int(k, 16))
-                    else:
-                        self.write_value(k)
-                    self.write_value(v)
-        elif isinstance(value, list):
-            self.writer.write_uint32(GodotVariantType.ARRAY)
-            self.writer.write_uint32(len(value))
-            for item in value:
-                self.write_value(item)
+                raise RuntimeError(f"Invalid dictionary key type: {type(key_val)}")
+            result[key] = read()
+        return result
+
+    def _read_array(self, flag: int) -> List:
+        read = self.read_value
+        # Every element takes at least a 4-byte type tag
+        size = self.reader.read_count(4)
+        result = [None] * size
+        for i in range(size):
+            result[i] = read()
+        return result
+
+    def _read_pool_byte_array(self, flag: int) -> List[int]:
+        length = self.reader.read_uint32()
+        result = list(self.reader.read_values('B', length, 1))
+        self.reader.advance((-length) & 3)
+        return result
+
+    def _read_pool_int_array(self, flag: int) -> List[int]:
+        count = self.reader.read_uint32()
+        return list(self.reader.read_values('i', count, 4))
+
+    def _read_pool_real_array(self, flag: int) -> List[float]:
+        count = self.reader.read_uint32()
+        return list(self.reader.read_values('f', count, 4))
+
+    def _read_pool_string_array(self, flag: int) -> List[str]:
+        # Godot counts the NUL terminator in each pool string's length
+        count = self.reader.read_count(4)
+        result = [None] * count
+        for i in range(count):
+            string = self._read_string(0)
+            result[i] = string[:-1] if string.endswith('\x00') else string
+        return result
+
+    def _read_pool_vector2_array(self, flag: int) -> List[Dict[str, float]]:
+        count = self.reader.read_uint32()
+        it = iter(self.reader.read_values('f', count * 2, 4))
+        return [{"x": x, "y": y} for x, y in zip(it, it)]
+
+    def _read_pool_vector3_array(self, flag: int) -> List[Dict[str, float]]:
+        count = self.reader.read_uint32()
+        it = iter(self.reader.read_values('f', count * 3, 4))
+        return [{"x": x, "y": y, "z": z} for x, y, z in zip(it, it, it)]
+
+    def _read_pool_color_array(self, flag: int) -> List[Dict[str, float]]:
+        count = self.reader.read_uint32()
+        it = iter(self.reader.read_values('f', count * 4, 4))
+        return [{"r": r, "g": g, "b": b, "a": a} for r, g, b, a in zip(it, it, it, it)]
+
+def _is_vector2(value: Dict) -> bool:
+    """Whether a dict should be written as a VECTOR2 (numeric x and y only)."""
+    return (len(value) == 2
+            and type(value.get("x")) in (int, float)
+            and type(value.get("y")) in (int, float))
+
+def _is_float_record(value: Dict, keys: str) -> bool:
+    """Whether a dict holds exactly the single-letter `keys`, all as floats.
+
+    Decoded VECTOR3 and COLOR components are always floats, so dicts with
+    integer or non-numeric values stay DICTIONARY variants.
+    """
+    return len(value) == len(keys) and all(type(value.get(k)) is float for k in keys)
+
+class WebFishingSerializer:
+    def __init__(self, fp: Optional[BinaryIO] = None):
+        self.writer = SaveFileWriter(fp)
+        self._start = fp.tell() if fp is not None else 0
+        # Keyed by exact type; _find_writer scans the same table with
+        # isinstance for subclasses such as IntEnum or OrderedDict
+        self._writers = {
+            type(None): self._write_nil,
+            bool: self._write_bool,
+            int: self._write_int,
+            float: self._write_real,
+            str: self._write_string,
+            dict: self._write_dictionary,
+            list: self._write_array,
+        }
+        # Reserve the length header; it is patched in once the payload is written
+        self.writer.data.extend(b'\x00\x00\x00\x00')
+        self._d = self.writer.data
+
+    def write_value(self, value: Any):
+        # Containers are walked with an explicit stack rather than recursion.
+        # Each frame is an iterator over a container's entries plus whether
+        # those entries are dictionary (key, value) pairs; container writers
+        # emit their header and return the frame for their contents
+        writers = self._writers
+        write_int = self._write_int
+        write_string = self._write_string
+        data = self._d
+        flush_at = self.writer.flush_at
+        stack = [(iter((value,)), False)]
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            entries, is_dict = stack[-1]
+            value = next(entries, _END)
+            if value is _END:
+                pop()
+                continue
+            if is_dict:
+                # Keys are always strings here, so write them without going
+                # back through the type dispatch
+                key, value = value
+                if key.startswith("0x"):
+                    write_int(int(key, 16))
+                else:
+                    write_string(key)
+            writer = writers.get(type(value))
+            if writer is None:
+                writer = self._find_writer(value)
+            frame = writer(value)
+            if frame is not None:
+                push(frame)
+            if len(data) >= flush_at:
+                self.writer.flush()
+
+    def _find_writer(self, value: Any):
+        # Subclasses of the supported types miss the exact-type lookup
+        for value_type, writer in self._writers.items():
+            if isinstance(value, value_type):
+                return writer
+        raise ValueError(f"Unsupported type: {type(value)}")
+
+    # Scalar writers append straight to the writer's buffer, packing the
+    # type tag and payload in one call
+    def _write_nil(self, value: None):
+        self._d += _NIL_BYTES
+
+    def _write_bool(self, value: bool):
+        self._d += _TRUE_BYTES if value else _FALSE_BYTES
+
+    def _write_int(self, value: int):
+        if _I32_MIN <= value <= _I32_MAX:
+            self._d += _TAG_I32.pack(GodotVariantType.INT, value)
         else:
-            raise ValueError(f"Unsupported type: {type(value)}")
+            self._d += _TAG_I64.pack(_INT64_TAG, value)
+
+    def _write_real(self, value: float):
+        self._d += _TAG_F64.pack(_DOUBLE_TAG, value)
+
+    def _write_string(self, value: str):
+        self.writer.write_uint32(GodotVariantType.STRING)
+        self.writer.write_string(value)
+
+    def _write_dictionary(self, value: Dict) -> Optional[Tuple[Iterator, bool]]:
+        if _is_vector2(value):
+            self._d += _TAG_V2.pack(GodotVariantType.VECTOR2, value["x"], value["y"])
+            return None
+        if _is_float_record(value, "xyz"):
+            self._d += _TAG_V3.pack(GodotVariantType.VECTOR3, value["x"], value["y"], value["z"])
+            return None
+        if _is_float_record(value, "rgba"):
+            self._d += _TAG_COLOR.pack(GodotVariantType.COLOR, value["r"], value["g"], value["b"], value["a"])
+            return None
+        self.writer.write_uint32(GodotVariantType.DICTIONARY)
+        self.writer.write_uint32(len(value))
+        return iter(value.items()), True
+
+    def _write_array(self, value: List) -> Tuple[Iterator, bool]:
+        self.writer.write_uint32(GodotVariantType.ARRAY)
+        self.writer.write_uint32(len(value))
+        return iter(value), False
 
     def serialize(self, data: Dict) -> bytes:
+        if self.writer.fp is not None:
+            raise RuntimeError("serialize() cannot be used with an output file; use serialize_to_file()")
+        self.write_value(data)
+        _U32.pack_into(self.writer.data, 0, len(self.writer.data))
+        return self.writer.get_data()
+
+    def serialize_to_file(self, data: Dict) -> int:
+        """Stream `data` to the writer's output file and return its total size."""
+        fp = self.writer.fp
+        if fp is None:
+            raise RuntimeError("serialize_to_file() requires a serializer created with an output file")
         self.write_value(data)
-        full_data = SaveFileWriter()
-        full_data.write_uint32(len(self.writer.get_data()) + 4)
-        full_data.data.extend(self.writer.get_data())
-        return full_data.get_data()
+        self.writer.flush()
+        end = fp.tell()
+        total = end - self._start
+        fp.seek(self._start)
+        fp.write(_U32.pack(total))
+        fp.seek(end)
+        return total
 
 def parse_save_file(file_path: str) -> Dict:
     """Parse a WebFishing save file and return its contents as a dictionary."""
     with open(file_path, 'rb') as f:
-        data = f.read()
-    
-    deserializer = WebFishingDeserializer(data)
-    return deserializer.read_value()
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files, pipes and other non-regular files cannot be mapped
+            return WebFishingDeserializer(f.read()).read_value()
+        with mm, memoryview(mm) as data:
+            deserializer = WebFishingDeserializer(data)
+            return deserializer.read_value()
+
+def read_json_file(file_path: str) -> Any:
+    """Load a JSON file, using orjson when it is installed."""
+    if orjson is None:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        # orjson rejects the NaN/Infinity literals that json.dump writes
+        # for non-finite floats
+        return json.loads(raw.decode('utf-8'))
+
+def write_json_file(data: Any, file_path: str):
+    """Write data as indented JSON."""
+    # Always uses the json module: orjson would write non-finite floats as
+    # null and only supports two-space indentation
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
 
 def convert_json_to_sav(json_file: str, sav_file: str):
     """Convert a JSON file to a WebFishing save file."""
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = read_json_file(json_file)
 
-    serializer = WebFishingSerializer()
-    sav_data = serializer.serialize(data)
-
-    with open(sav_file, 'wb') as f:
-        f.write(sav_data)
+    # Encode into a temporary file beside the real target (following
+    # symlinks), so a failed encode never touches an existing save
+    target = os.path.realpath(sav_file)
+    tmp = tempfile.NamedTemporaryFile(dir=os.path.dirname(target), suffix='.tmp', delete=False)
+    try:
+        with tmp:
+            serializer = WebFishingSerializer(tmp)
+            serializer.serialize_to_file(data)
+        try:
+            st = os.stat(target)
+        except FileNotFoundError:
+            st = None
+        if (st is None or st.st_nlink > 1
+                or (hasattr(os, 'geteuid') and st.st_uid != os.geteuid())):
+            # New files get default permissions, and hard-linked or
+            # foreign-owned saves are rewritten in place to keep their inode
+            shutil.copyfile(tmp.name, target)
+            os.unlink(tmp.name)
+        else:
+            shutil.copymode(target, tmp.name)
+            os.replace(tmp.name, target)
+    except BaseException:
+        if os.path.exists(tmp.name):
+            os.unlink(tmp.name)
+        raise
 
 def main():
     parser = argparse.ArgumentParser(description="WebFishing Save File Tool - Convert between .sav and JSON formats")
@@ -268,9 +552,8 @@ def main():
     try:
         if args.command == 'decode':
             save_data = parse_save_file(args.input_file)
-            with open(args.output_file, "w", encoding="utf-8") as f:
-                json.dump(save_data, f, indent=4)
-                
+            write_json_file(save_data, args.output_file)
+
             print(f"Successfully decoded save file and wrote to {args.output_file}")
 
             if args.info: